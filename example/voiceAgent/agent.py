@@ -2,19 +2,73 @@ import asyncio
 import json
 import os
 import base64
+import binascii
+import time
 import pyaudio
 import websockets
 from websockets.asyncio.client import connect
 from collections import deque
 import threading
 from dotenv import load_dotenv
-from tools import TOOLS_REGISTRY, TOOLS_DEFINITIONS
+from tools import TOOLS_REGISTRY, TOOLS_DEFINITIONS, CONCURRENT_TOOLS
 from typing import Dict
 
-CHUNK = 1024 
+CHUNK = 480  # 20 ms at 24 kHz
+PLAYBACK_CHUNK = 240  # 10 ms PortAudio output buffer
 FORMAT = pyaudio.paInt16
 CHANNELS = 1
 RATE = 24000 
+SEND_BATCH_CHUNKS = 2  # ~40 ms of audio per input_audio_buffer.append
+SEND_QUEUE_SIZE = 8
+OUTPUT_BUFFER_CHUNKS = 256
+
+# Fixed JSON envelope for input_audio_buffer.append; base64 needs no escaping
+AUDIO_APPEND_PREFIX = '{"type": "input_audio_buffer.append", "audio": "'
+AUDIO_APPEND_SUFFIX = '"}'
+RESPONSE_CREATE = json.dumps({"type": "response.create"})
+
+AUDIO_DELTA_TYPE = '"response.audio.delta"'
+AUDIO_DELTA_KEY = '"delta":"'
+
+PLAYBACK_CPUS = {1}
+PLAYBACK_RT_PRIORITY = 20
+
+
+def pin_current_thread(cpus, rt_priority=None):
+    """Best-effort CPU pinning (and optional SCHED_FIFO) for the calling thread on Linux.
+
+    Threads inherit their creator's affinity, so only pin threads that don't spawn others.
+    """
+    if not hasattr(os, "sched_setaffinity"):
+        return
+    allowed = os.sched_getaffinity(0)  # What cgroups/taskset leave us, not every CPU
+    if len(allowed) < 2 or not cpus <= allowed:
+        return
+    try:
+        os.sched_setaffinity(0, cpus)
+    except OSError:
+        return
+    if rt_priority is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(rt_priority))
+        except OSError:
+            pass  # Needs CAP_SYS_NICE; affinity alone still helps
+
+def extract_audio_delta(message):
+    """Pull the base64 payload out of a response.audio.delta frame without a full JSON parse"""
+    if not isinstance(message, str) or AUDIO_DELTA_TYPE not in message[:64]:
+        return None
+    start = message.find(AUDIO_DELTA_KEY)
+    if start < 0:
+        return None
+    start += len(AUDIO_DELTA_KEY)
+    end = message.find('"', start)
+    if end < 0:
+        return None
+    audio_base64 = message[start:end]
+    if "\\" in audio_base64:
+        return None  # Escaped payload, let json.loads handle it
+    return audio_base64
 
 class VoiceAgent:
     def __init__(self, api_key: str, extra_tools_registry: Dict = None, extra_tools_definitions: list = None):
@@ -25,17 +79,31 @@ class VoiceAgent:
         self.output_stream = None
         self.is_running = False
         self.is_speaking = False
-        self.output_buffer = deque()
-        self.buffer_lock = threading.Lock()
+        # Single producer (event loop) / single consumer (playback thread):
+        # deque.append and deque.popleft are atomic, so no lock is needed
+        self.output_buffer = deque(maxlen=OUTPUT_BUFFER_CHUNKS)
+        self.buffer_ready = threading.Event()
+        self.buffer_overflowed = False
         self.playback_task = None
+        self.capture_task = None
+        self.send_queue = None
+        self.loop = None
+        self.session_update = None  # Serialized session.update, built on first connect
+        self.tool_tasks = set()  # In-flight tool calls; held so they aren't garbage collected
+        self.serial_tool_lock = None  # Orders the non-concurrent tools; created with the loop
         
+        # Keyed by name so extra tools replace built-ins of the same name (e.g. the
+        # robot's move_robot over the simulated one) instead of being sent twice
         self.tools_registry = {**TOOLS_REGISTRY}
-        self.tools_definitions = TOOLS_DEFINITIONS.copy()
+        definitions = {tool["name"]: tool for tool in TOOLS_DEFINITIONS}
         
         if extra_tools_registry:
             self.tools_registry.update(extra_tools_registry)
         if extra_tools_definitions:
-            self.tools_definitions.extend(extra_tools_definitions)
+            definitions.update((tool["name"], tool) for tool in extra_tools_definitions)
+        self.tools_definitions = list(definitions.values())
+        # An extra tool that replaces a built-in of the same name isn't assumed safe to overlap
+        self.concurrent_tools = CONCURRENT_TOOLS - set(extra_tools_registry or ())
         
     async def connect(self):
         url = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview-2024-10-01"
@@ -43,10 +111,17 @@ class VoiceAgent:
             "Authorization": f"Bearer {self.api_key}",
             "OpenAI-Beta": "realtime=v1"
         }
-        self.ws = await connect(url, additional_headers=headers)
+        # Base64 audio does not compress; permessage-deflate only costs CPU
+        self.ws = await connect(url, additional_headers=headers, compression=None)
         await self.configure_session()
         
     async def configure_session(self):
+        if self.session_update is None:
+            self.session_update = self.build_session_update()
+        await self.ws.send(self.session_update)
+        print(f"✓ Connected with {len(self.tools_definitions)} tools available")
+        
+    def build_session_update(self) -> str:
         config = {
             "type": "session.update",
             "session": {
@@ -66,8 +141,7 @@ class VoiceAgent:
                 "tool_choice": "auto"
             }
         }
-        await self.ws.send(json.dumps(config))
-        print(f"✓ Connected with {len(self.tools_definitions)} tools available")
+        return json.dumps(config)
         
     def setup_audio_streams(self):
         self.input_stream = self.audio.open(
@@ -76,38 +150,78 @@ class VoiceAgent:
         )
         self.output_stream = self.audio.open(
             format=FORMAT, channels=CHANNELS, rate=RATE,
-            output=True, frames_per_buffer=CHUNK
+            output=True, frames_per_buffer=PLAYBACK_CHUNK
         )
         
-    async def send_audio(self):
+    def capture_audio(self):
+        # Runs on its own thread so the blocking mic read and base64 encoding
+        # never stall the event loop; finished frames are handed to send_audio.
         consecutive_errors = 0
         max_consecutive_errors = 10
+        batch = bytearray()
+        batch_bytes = SEND_BATCH_CHUNKS * CHUNK * 2
         
         while self.is_running:
             try:
-                if not self.is_speaking:
-                    audio_data = self.input_stream.read(CHUNK, exception_on_overflow=False)
-                    audio_base64 = base64.b64encode(audio_data).decode('utf-8')
-                    message = {"type": "input_audio_buffer.append", "audio": audio_base64}
-                    await self.ws.send(json.dumps(message))
-                    consecutive_errors = 0  # Reset error counter on success
-                else:
-                    self.input_stream.read(CHUNK, exception_on_overflow=False)
+                audio_data = self.input_stream.read(CHUNK, exception_on_overflow=False)
+                consecutive_errors = 0  # Reset error counter on success
             except Exception as e:
                 consecutive_errors += 1
                 if "Input overflowed" in str(e):
                     # This is normal, just continue
                     consecutive_errors = 0
                     continue
-                else:
-                    print(f"⚠️ Audio send error: {e}")
-                    if consecutive_errors >= max_consecutive_errors:
-                        print(f"❌ Too many consecutive audio send errors ({consecutive_errors}), stopping")
-                        self.is_running = False
-                        break
-                    await asyncio.sleep(0.1)
-                    continue
-            await asyncio.sleep(0.01)
+                print(f"⚠️ Audio capture error: {e}")
+                if consecutive_errors >= max_consecutive_errors:
+                    print(f"❌ Too many consecutive audio capture errors ({consecutive_errors}), stopping")
+                    self.is_running = False
+                    break
+                time.sleep(0.1)
+                continue
+            
+            if self.is_speaking:
+                batch.clear()
+                continue
+            batch += audio_data
+            if len(batch) < batch_bytes:
+                continue
+            audio_base64 = base64.b64encode(batch).decode('ascii')
+            batch.clear()
+            message = AUDIO_APPEND_PREFIX + audio_base64 + AUDIO_APPEND_SUFFIX
+            try:
+                self.loop.call_soon_threadsafe(self.enqueue_audio, message)
+            except RuntimeError:
+                return  # Event loop already closed
+        
+        try:
+            self.loop.call_soon_threadsafe(self.enqueue_audio, None)  # Wake send_audio
+        except RuntimeError:
+            pass
+    
+    def enqueue_audio(self, message):
+        if self.send_queue.full():
+            self.send_queue.get_nowait()  # Drop the oldest frame rather than fall behind
+        self.send_queue.put_nowait(message)
+        
+    async def send_audio(self):
+        consecutive_errors = 0
+        max_consecutive_errors = 10
+        
+        while self.is_running:
+            message = await self.send_queue.get()
+            if message is None:
+                break
+            try:
+                await self.ws.send(message)
+                consecutive_errors = 0  # Reset error counter on success
+            except Exception as e:
+                consecutive_errors += 1
+                print(f"⚠️ Audio send error: {e}")
+                if consecutive_errors >= max_consecutive_errors:
+                    print(f"❌ Too many consecutive audio send errors ({consecutive_errors}), stopping")
+                    self.is_running = False
+                    break
+                await asyncio.sleep(0.1)
             
     async def receive_messages(self):
         consecutive_errors = 0
@@ -116,6 +230,11 @@ class VoiceAgent:
         try:
             async for message in self.ws:
                 try:
+                    audio_base64 = extract_audio_delta(message)
+                    if audio_base64 is not None:
+                        self.queue_audio_delta(audio_base64)
+                        consecutive_errors = 0
+                        continue
                     data = json.loads(message)
                     consecutive_errors = 0  # Reset error counter on success
                     await self.handle_message(data)
@@ -144,12 +263,25 @@ class VoiceAgent:
                 self.is_running = False
             
     def continuous_playback(self):
+        pin_current_thread(PLAYBACK_CPUS, PLAYBACK_RT_PRIORITY)
         while self.is_running:
-            with self.buffer_lock:
-                if len(self.output_buffer) > 0:
-                    audio_data = self.output_buffer.popleft()
-                    self.output_stream.write(audio_data)
-            asyncio.run(asyncio.sleep(0.001))
+            try:
+                audio_data = self.output_buffer.popleft()
+            except IndexError:
+                # Clear before re-checking so a concurrent append is never missed
+                self.buffer_ready.clear()
+                if not self.output_buffer:
+                    self.buffer_ready.wait(timeout=0.05)
+                continue
+            self.output_stream.write(audio_data)
+    
+    def queue_audio_delta(self, audio_base64: str):
+        if audio_base64:
+            if len(self.output_buffer) == OUTPUT_BUFFER_CHUNKS and not self.buffer_overflowed:
+                print("⚠️ Playback buffer full, dropping oldest audio")
+                self.buffer_overflowed = True
+            self.output_buffer.append(binascii.a2b_base64(audio_base64))
+            self.buffer_ready.set()
     
     async def handle_message(self, data: dict):
         msg_type = data.get("type")
@@ -161,11 +293,7 @@ class VoiceAgent:
             print()
             
         elif msg_type == "response.audio.delta":
-            audio_base64 = data.get("delta", "")
-            if audio_base64:
-                audio_data = base64.b64decode(audio_base64)
-                with self.buffer_lock:
-                    self.output_buffer.append(audio_data)
+            self.queue_audio_delta(data.get("delta", ""))
         
         elif msg_type == "response.created":
             self.is_speaking = True
@@ -187,7 +315,11 @@ class VoiceAgent:
             arguments_str = data.get("arguments", "{}")
             print(f"🔧 [Calling: {function_name}]")
             arguments = json.loads(arguments_str)
-            await self.execute_function(call_id, function_name, arguments)
+            # Don't wait for the tool here so the receive loop keeps running; HTTP
+            # tools overlap, robot tools queue on serial_tool_lock in call order
+            task = asyncio.create_task(self.execute_function(call_id, function_name, arguments))
+            self.tool_tasks.add(task)
+            task.add_done_callback(self.tool_tasks.discard)
             
         elif msg_type == "error":
             print(f"❌ Error: {data.get('error', {}).get('message', 'Unknown')}")
@@ -202,10 +334,14 @@ class VoiceAgent:
                 print(f"❌ [Function Error: {error_msg}]")
                 result = {"error": error_msg, "function_name": function_name}
             else:
-                # Execute the function
-                func = TOOLS_REGISTRY[function_name]
+                # Execute the function; tools block (HTTP, robot SDK, sleeps), so keep them off the loop
+                func = self.tools_registry[function_name]
                 print(f"🔧 [Executing: {function_name} with args: {arguments}]")
-                result = func(arguments)
+                if function_name in self.concurrent_tools:
+                    result = await asyncio.to_thread(func, arguments)
+                else:
+                    async with self.serial_tool_lock:
+                        result = await asyncio.to_thread(func, arguments)
                 print(f"✅ [Result: {result.get('message', result)}]")
                 
         except Exception as e:
@@ -229,7 +365,7 @@ class VoiceAgent:
                 }
             }
             await self.ws.send(json.dumps(response))
-            await self.ws.send(json.dumps({"type": "response.create"}))
+            await self.ws.send(RESPONSE_CREATE)
         except Exception as e:
             print(f"❌ [Response Error: Failed to send function result back to API: {str(e)}]")
             
@@ -237,8 +373,13 @@ class VoiceAgent:
         await self.connect()
         self.setup_audio_streams()
         self.is_running = True
+        self.loop = asyncio.get_running_loop()
+        self.send_queue = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.serial_tool_lock = asyncio.Lock()
         self.playback_task = threading.Thread(target=self.continuous_playback, daemon=True)
         self.playback_task.start()
+        self.capture_task = threading.Thread(target=self.capture_audio, daemon=True)
+        self.capture_task.start()
         
         print("\n🤖 Voice agent ready!")
         print("💬 Speak naturally - I'll listen, respond, then listen again")
@@ -247,25 +388,50 @@ class VoiceAgent:
         send_task = asyncio.create_task(self.send_audio())
         receive_task = asyncio.create_task(self.receive_messages())
         
-        await asyncio.gather(send_task, receive_task, return_exceptions=True)
-        await self.cleanup()
+        try:
+            await asyncio.gather(send_task, receive_task, return_exceptions=True)
+        finally:
+            await self.aclose()
+            self.cleanup()
+
+    async def aclose(self):
+        # The websocket belongs to the running loop, so it is closed here
+        # rather than from the synchronous audio teardown.
+        for task in list(self.tool_tasks):
+            task.cancel()
+        if self.ws:
+            await self.ws.close()
+            self.ws = None
             
-    async def cleanup(self):
+    def cleanup(self):
         self.is_running = False
         if self.playback_task:
             self.playback_task.join(timeout=2.0)
-        with self.buffer_lock:
-            self.output_buffer.clear()
+            self.playback_task = None
+        if self.capture_task:
+            self.capture_task.join(timeout=2.0)
+            self.capture_task = None
+        self.output_buffer.clear()
         if self.input_stream:
             self.input_stream.stop_stream()
             self.input_stream.close()
+            self.input_stream = None
         if self.output_stream:
             self.output_stream.stop_stream()
             self.output_stream.close()
+            self.output_stream = None
         if self.audio:
             self.audio.terminate()
-        if self.ws:
-            await self.ws.close()
+            self.audio = None
+
+
+def run_event_loop(main_coro):
+    """Run main_coro on uvloop when it is installed, else on the default asyncio loop"""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(main_coro)
+    return uvloop.run(main_coro)
 
 
 async def main():
@@ -285,8 +451,9 @@ async def main():
     except Exception as e:
         print(f"\nError: {e}")
     finally:
-        await agent.cleanup()
+        await agent.aclose()
+        agent.cleanup()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_event_loop(main())
@@ -105,7 +105,6 @@ def comprehensive_audio_test():
                     # Use a shorter timeout for read operation
                     audio_data = agent.input_stream.read(1024, exception_on_overflow=False)
                     capture_count += 1
-                    print(".", end="", flush=True)
                     
                     # Check for timeout on individual read
                     if time.time() - start_time > 3:
@@ -117,15 +116,15 @@ def comprehensive_audio_test():
                         continue
                     else:
                         report.append(f"❌ Microphone capture error: {e}")
-                        print(f"\n   ❌ Microphone capture error: {e}")
+                        print(f"   ❌ Microphone capture error: {e}")
                         break
             
             if capture_count > 0:
                 report.append(f"✅ Microphone capture successful ({capture_count} chunks captured)")
-                print(f"\n   ✅ Microphone capture successful ({capture_count} chunks)")
+                print(f"   ✅ Microphone capture successful ({capture_count} chunks)")
             else:
                 report.append("⚠️  Microphone capture completed but no audio chunks captured")
-                print(f"\n   ⚠️  Microphone capture completed but no audio chunks captured")
+                print(f"   ⚠️  Microphone capture completed but no audio chunks captured")
                 
         except Exception as e:
             report.append(f"❌ Microphone test failed: {e}")
@@ -144,9 +143,13 @@ def comprehensive_audio_test():
             duration = 1  # 1 second
             frequency = 440  # A note
             
-            t = np.linspace(0, duration, int(sample_rate * duration), False)
-            wave_data = np.sin(frequency * 2 * np.pi * t)
-            wave_data = (wave_data * 32767).astype(np.int16)
+            # Build the tone in one float32 buffer, in place, then cast once to int16
+            wave_data = np.arange(int(sample_rate * duration), dtype=np.float32)
+            wave_data *= np.float32(2 * np.pi * frequency / sample_rate)
+            np.sin(wave_data, out=wave_data)
+            wave_data *= 32767
+            np.rint(wave_data, out=wave_data)
+            wave_data = wave_data.astype(np.int16)
             
             # Play the tone
             agent.output_stream.write(wave_data.tobytes())
@@ -1,4 +1,5 @@
 import sys
+import threading
 import time
 from typing import Dict, Any
 sys.path.insert(0, '../..')
@@ -10,6 +11,54 @@ def set_robot_client(client: B1LocoClient):
     global _robot_client
     _robot_client = client
 
+# Last velocity / head target the robot accepted and when, shared by the voice
+# tools and the keyboard loop so a held key doesn't resend the same command.
+# The robot can change state behind our back (remote controller, other SDK
+# clients), so a cached target only suppresses repeats for REPEAT_WINDOW seconds.
+REPEAT_WINDOW = 1.0
+_command_lock = threading.Lock()
+_last_move = None
+_last_head = None
+
+def _is_repeat(last, target):
+    return last is not None and last[0] == target and time.monotonic() - last[1] < REPEAT_WINDOW
+
+def send_move(client: B1LocoClient, x: float, y: float, z: float):
+    """client.Move, or None without sending if this non-zero velocity was just sent.
+
+    Stop (0, 0, 0) is always sent.
+    """
+    global _last_move
+    target = (x, y, z)
+    with _command_lock:
+        if any(target) and _is_repeat(_last_move, target):
+            return None
+        _last_move = None  # Unknown until the SDK accepts it
+        res = client.Move(x, y, z)
+        if res == 0:
+            _last_move = (target, time.monotonic())
+    return res
+
+def send_head(client: B1LocoClient, pitch: float, yaw: float):
+    """client.RotateHead, or None without sending if this target was just sent"""
+    global _last_head
+    target = (pitch, yaw)
+    with _command_lock:
+        if _is_repeat(_last_head, target):
+            return None
+        _last_head = None
+        res = client.RotateHead(pitch, yaw)
+        if res == 0:
+            _last_head = (target, time.monotonic())
+    return res
+
+def send_mode(client: B1LocoClient, mode):
+    """client.ChangeMode; a mode switch resets motion, so forget the cached targets"""
+    global _last_move, _last_head
+    with _command_lock:
+        _last_move = _last_head = None
+        return client.ChangeMode(mode)
+
 def move_robot(args: Dict[str, Any]) -> Dict[str, Any]:
     direction = args.get("direction", "forward").lower()
     distance = args.get("distance", 1.0)
@@ -27,9 +76,9 @@ def move_robot(args: Dict[str, Any]) -> Dict[str, Any]:
     elif direction == "stop":
         x, y, z = 0.0, 0.0, 0.0
     
-    res = _robot_client.Move(x, y, z)
+    res = send_move(_robot_client, x, y, z) or 0
     time.sleep(distance)
-    _robot_client.Move(0.0, 0.0, 0.0)
+    send_move(_robot_client, 0.0, 0.0, 0.0)
     
     return {
         "direction": direction,
@@ -53,7 +102,7 @@ def rotate_head(args: Dict[str, Any]) -> Dict[str, Any]:
     elif direction == "center":
         yaw, pitch = 0.0, 0.0
     
-    res = _robot_client.RotateHead(pitch, yaw)
+    res = send_head(_robot_client, pitch, yaw) or 0
     
     return {
         "direction": direction,
@@ -73,38 +122,38 @@ def celebration(args: Dict[str, Any]) -> Dict[str, Any]:
     _robot_client.MoveHandEndEffector(right_posture, 1000, B1HandIndex.kRightHand)
     
     time.sleep(1.0)
-    _robot_client.Move(0.8, 0.0, 0.0)
+    send_move(_robot_client, 0.8, 0.0, 0.0)
     time.sleep(1.0)
-    _robot_client.Move(0.0, 0.0, 0.0)
+    send_move(_robot_client, 0.0, 0.0, 0.0)
     
     return {
         "status": "success",
         "message": "Celebration sequence complete!"
     }
 
+def make_finger_param(seq, angle):
+    finger_param = DexterousFingerParameter()
+    finger_param.seq = seq
+    finger_param.angle = angle
+    finger_param.force = 200
+    finger_param.speed = 800
+    return finger_param
+
+def make_finger_params(angles):
+    return [make_finger_param(i, angle) for i, angle in enumerate(angles)]
+
+# Built once at import; the SDK only reads these when sending a hand command
+GESTURE_FINGER_PARAMS = {
+    "rock": make_finger_params([0, 0, 0, 0, 0, 0]),
+    "scissor": make_finger_params([0, 0, 1000, 1000, 0, 0]),
+    "paper": make_finger_params([1000, 1000, 1000, 1000, 1000, 1000]),
+    "ok": make_finger_params([1000, 1000, 1000, 500, 400, 350]),
+}
+
 def hand_gesture(args: Dict[str, Any]) -> Dict[str, Any]:
     gesture = args.get("gesture", "paper").lower()
     
-    finger_params = []
-    
-    if gesture == "rock":
-        angles = [0, 0, 0, 0, 0, 0]
-    elif gesture == "scissor":
-        angles = [0, 0, 1000, 1000, 0, 0]
-    elif gesture == "paper":
-        angles = [1000, 1000, 1000, 1000, 1000, 1000]
-    elif gesture == "ok":
-        angles = [1000, 1000, 1000, 500, 400, 350]
-    else:
-        angles = [1000, 1000, 1000, 1000, 1000, 1000]
-    
-    for i, angle in enumerate(angles):
-        finger_param = DexterousFingerParameter()
-        finger_param.seq = i if i != 5 else 5
-        finger_param.angle = angle
-        finger_param.force = 200
-        finger_param.speed = 800
-        finger_params.append(finger_param)
+    finger_params = GESTURE_FINGER_PARAMS.get(gesture, GESTURE_FINGER_PARAMS["paper"])
     
     res = _robot_client.ControlDexterousHand(finger_params, B1HandIndex.kRightHand)
     
@@ -125,7 +174,7 @@ def change_mode(args: Dict[str, Any]) -> Dict[str, Any]:
     }
     
     robot_mode = mode_map.get(mode, RobotMode.kWalking)
-    res = _robot_client.ChangeMode(robot_mode)
+    res = send_mode(_robot_client, robot_mode)
     
     return {
         "mode": mode,
@@ -1,8 +1,8 @@
 import sys
 import asyncio
 import os
-import time
 import random
+import threading
 
 sys.path.insert(0, '../..')
 from booster_robotics_sdk_python import (
@@ -10,200 +10,221 @@ from booster_robotics_sdk_python import (
     Position, Orientation, Posture
 )
 from dotenv import load_dotenv
-from agent import VoiceAgent
-from robot_tools import ROBOT_TOOLS_REGISTRY, ROBOT_TOOLS_DEFINITIONS, set_robot_client
+from agent import VoiceAgent, run_event_loop
+from robot_tools import (
+    ROBOT_TOOLS_REGISTRY, ROBOT_TOOLS_DEFINITIONS, GESTURE_FINGER_PARAMS,
+    send_move, send_head, send_mode, set_robot_client
+)
 
 
 # ---------------------------
 # Hand poses / gestures
 # ---------------------------
 def hand_rock(client: B1LocoClient):
-    from booster_robotics_sdk_python import DexterousFingerParameter
-    finger_params = []
-    for i in range(6):
-        p = DexterousFingerParameter()
-        p.seq = 5 if i == 5 else i
-        p.angle = 0
-        p.force = 200
-        p.speed = 800
-        finger_params.append(p)
-    client.ControlDexterousHand(finger_params, B1HandIndex.kRightHand)
+    client.ControlDexterousHand(GESTURE_FINGER_PARAMS["rock"], B1HandIndex.kRightHand)
 
 
 def hand_scissor(client: B1LocoClient):
-    from booster_robotics_sdk_python import DexterousFingerParameter
-    angles = [0, 0, 1000, 1000, 0, 0]
-    finger_params = []
-    for i, angle in enumerate(angles):
-        p = DexterousFingerParameter()
-        p.seq = 5 if i == 5 else i
-        p.angle = angle
-        p.force = 200
-        p.speed = 800
-        finger_params.append(p)
-    client.ControlDexterousHand(finger_params, B1HandIndex.kRightHand)
+    client.ControlDexterousHand(GESTURE_FINGER_PARAMS["scissor"], B1HandIndex.kRightHand)
 
 
 def hand_paper(client: B1LocoClient):
-    from booster_robotics_sdk_python import DexterousFingerParameter
-    finger_params = []
-    for i in range(6):
-        p = DexterousFingerParameter()
-        p.seq = 5 if i == 5 else i
-        p.angle = 1000
-        p.force = 200
-        p.speed = 800
-        finger_params.append(p)
-    client.ControlDexterousHand(finger_params, B1HandIndex.kRightHand)
+    client.ControlDexterousHand(GESTURE_FINGER_PARAMS["paper"], B1HandIndex.kRightHand)
 
 
 def hand_ok(client: B1LocoClient):
-    from booster_robotics_sdk_python import DexterousFingerParameter
-    angles = [1000, 1000, 1000, 500, 400, 350]
-    finger_params = []
-    for i, angle in enumerate(angles):
-        p = DexterousFingerParameter()
-        p.seq = 5 if i == 5 else i
-        p.angle = angle
-        p.force = 200
-        p.speed = 800
-        finger_params.append(p)
-    client.ControlDexterousHand(finger_params, B1HandIndex.kRightHand)
-
-
-def celebration_sequence(client: B1LocoClient):
+    client.ControlDexterousHand(GESTURE_FINGER_PARAMS["ok"], B1HandIndex.kRightHand)
+
+
+RPS_GESTURES = (hand_rock, hand_scissor, hand_paper)
+
+
+async def celebration_sequence(client: B1LocoClient):
     left = Posture()
     left.position = Position(0.3, 0.3, 0.4)
     left.orientation = Orientation(0.0, 0.0, 0.0)
-    client.MoveHandEndEffector(left, 1000, B1HandIndex.kLeftHand)
 
     right = Posture()
     right.position = Position(0.3, -0.3, 0.4)
     right.orientation = Orientation(0.0, 0.0, 0.0)
+
+    client.MoveHandEndEffector(left, 1000, B1HandIndex.kLeftHand)
     client.MoveHandEndEffector(right, 1000, B1HandIndex.kRightHand)
 
-    time.sleep(1.0)
-    client.Move(0.8, 0.0, 0.0)
-    time.sleep(1.0)
-    client.Move(0.0, 0.0, 0.0)
+    await asyncio.sleep(1.0)
+    send_move(client, 0.8, 0.0, 0.0)
+    await asyncio.sleep(1.0)
+    send_move(client, 0.0, 0.0, 0.0)
 
 
 # ---------------------------
 # Keyboard control loop
 # ---------------------------
+class KeyboardState:
+    def __init__(self):
+        self.x = self.y = self.z = 0.0
+        self.yaw = self.pitch = 0.0
+
+    def print_params(self):
+        print(f"Param: {self.x} {self.y} {self.z}")
+        print(f"Head param: {self.pitch} {self.yaw}")
+
+
+def move_command(x: float, y: float, z: float):
+    def command(client: B1LocoClient, state: KeyboardState):
+        state.x, state.y, state.z = x, y, z
+        res = send_move(client, x, y, z)
+        if res is not None:
+            state.print_params()
+        return res
+    return command
+
+
+def head_command(pitch: float, yaw: float):
+    def command(client: B1LocoClient, state: KeyboardState):
+        state.pitch, state.yaw = pitch, yaw
+        res = send_head(client, pitch, yaw)
+        if res is not None:
+            state.print_params()
+        return res
+    return command
+
+
+def mode_command(mode):
+    return lambda client, state: send_mode(client, mode)
+
+
+def action_command(action):
+    return lambda client, state: action(client)
+
+
+async def hand_down(client: B1LocoClient):
+    tar = Posture()
+    tar.position = Position(0.28, -0.25, 0.05)
+    tar.orientation = Orientation(0.0, 0.0, 0.0)
+    res = client.MoveHandEndEffector(tar, 1000, B1HandIndex.kRightHand)
+    await asyncio.sleep(0.3)
+    random.choice(RPS_GESTURES)(client)
+    return res
+
+
+async def hand_up(client: B1LocoClient):
+    tar = Posture()
+    tar.position = Position(0.25, -0.3, 0.25)
+    tar.orientation = Orientation(0.0, -1.0, 0.0)
+    res = client.MoveHandEndEffector(tar, 1000, B1HandIndex.kRightHand)
+    await asyncio.sleep(0.3)
+    hand_paper(client)
+    return res
+
+
+KEYBOARD_COMMANDS = {
+    "mp": mode_command(RobotMode.kPrepare),
+    "md": mode_command(RobotMode.kDamping),
+    "mw": mode_command(RobotMode.kWalking),
+    "mc": mode_command(RobotMode.kCustom),
+
+    "stop": move_command(0.0, 0.0, 0.0),
+    "w": move_command(0.8, 0.0, 0.0),
+    "a": move_command(0.0, 0.2, 0.0),
+    "s": move_command(-0.2, 0.0, 0.0),
+    "d": move_command(0.0, -0.2, 0.0),
+    "q": move_command(0.0, 0.0, 0.2),
+    "e": move_command(0.0, 0.0, -0.2),
+
+    "hd": head_command(1.0, 0.0),
+    "hu": head_command(-0.3, 0.0),
+    "hr": head_command(0.0, -0.785),
+    "hl": head_command(0.0, 0.785),
+    "ho": head_command(0.0, 0.0),
+
+    "cel": action_command(celebration_sequence),
+    "hand-down": action_command(hand_down),
+    "hand-up": action_command(hand_up),
+    "paper": action_command(hand_paper),
+    "scissor": action_command(hand_scissor),
+    "rock": action_command(hand_rock),
+    "ok": action_command(hand_ok),
+}
+
+
+def read_stdin_lines(loop, queue):
+    """Blocking stdin reader; runs on its own thread for the whole session"""
+    try:
+        while True:
+            loop.call_soon_threadsafe(queue.put_nowait, input())
+    except (EOFError, RuntimeError):
+        pass
+    try:
+        loop.call_soon_threadsafe(queue.put_nowait, None)
+    except RuntimeError:
+        pass  # Loop already closed
+
+
+def watch_stdin(loop, queue):
+    """Push stdin lines into queue when the loop sees the fd become readable.
+
+    Returns the fd being watched, or None if the loop can't watch stdin
+    (Windows proactor loop, stdin redirected from a regular file, ...), in
+    which case a reader thread is started instead.
+    """
+    try:
+        fd = sys.stdin.fileno()
+        pending = ""
+
+        def on_readable():
+            nonlocal pending
+            data = os.read(fd, 4096)
+            if not data:
+                loop.remove_reader(fd)
+                if pending:
+                    queue.put_nowait(pending)
+                queue.put_nowait(None)
+                return
+            *complete, pending = (pending + data.decode(errors="replace")).split("\n")
+            for line in complete:
+                queue.put_nowait(line)
+
+        loop.add_reader(fd, on_readable)
+        return fd
+    except (NotImplementedError, OSError, ValueError):
+        threading.Thread(target=read_stdin_lines, args=(loop, queue), daemon=True).start()
+        return None
+
+
 async def keyboard_control_loop(client: B1LocoClient):
-    x = y = z = 0.0
-    yaw = pitch = 0.0
+    state = KeyboardState()
+    lines = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+    stdin_fd = watch_stdin(loop, lines)
+    try:
+        await run_keyboard_commands(client, state, lines)
+    finally:
+        if stdin_fd is not None:
+            loop.remove_reader(stdin_fd)
+
 
+async def run_keyboard_commands(client: B1LocoClient, state: KeyboardState, lines: asyncio.Queue):
     while True:
-        await asyncio.sleep(0.01)
-        input_cmd = await asyncio.to_thread(input)
+        input_cmd = await lines.get()
+        if input_cmd is None:
+            break
         input_cmd = input_cmd.strip()
         if not input_cmd:
             continue
 
-        need_print = False
-        res = 0
-
-        if input_cmd == "mp":
-            res = client.ChangeMode(RobotMode.kPrepare)
-        elif input_cmd == "cel":
-            celebration_sequence(client)
-        elif input_cmd == "md":
-            res = client.ChangeMode(RobotMode.kDamping)
-        elif input_cmd == "mw":
-            res = client.ChangeMode(RobotMode.kWalking)
-        elif input_cmd == "mc":
-            res = client.ChangeMode(RobotMode.kCustom)
-
-        elif input_cmd == "stop":
-            x, y, z = 0.0, 0.0, 0.0
-            need_print = True
-            res = client.Move(x, y, z)
-        elif input_cmd == "w":
-            x, y, z = 0.8, 0.0, 0.0
-            need_print = True
-            res = client.Move(x, y, z)
-        elif input_cmd == "a":
-            x, y, z = 0.0, 0.2, 0.0
-            need_print = True
-            res = client.Move(x, y, z)
-        elif input_cmd == "s":
-            x, y, z = -0.2, 0.0, 0.0
-            need_print = True
-            res = client.Move(x, y, z)
-        elif input_cmd == "d":
-            x, y, z = 0.0, -0.2, 0.0
-            need_print = True
-            res = client.Move(x, y, z)
-        elif input_cmd == "q":
-            x, y, z = 0.0, 0.0, 0.2
-            need_print = True
-            res = client.Move(x, y, z)
-        elif input_cmd == "e":
-            x, y, z = 0.0, 0.0, -0.2
-            need_print = True
-            res = client.Move(x, y, z)
-
-        elif input_cmd == "hd":
-            yaw, pitch = 0.0, 1.0
-            need_print = True
-            res = client.RotateHead(pitch, yaw)
-        elif input_cmd == "hu":
-            yaw, pitch = 0.0, -0.3
-            need_print = True
-            res = client.RotateHead(pitch, yaw)
-        elif input_cmd == "hr":
-            yaw, pitch = -0.785, 0.0
-            need_print = True
-            res = client.RotateHead(pitch, yaw)
-        elif input_cmd == "hl":
-            yaw, pitch = 0.785, 0.0
-            need_print = True
-            res = client.RotateHead(pitch, yaw)
-        elif input_cmd == "ho":
-            yaw, pitch = 0.0, 0.0
-            need_print = True
-            res = client.RotateHead(pitch, yaw)
-
-        elif input_cmd == "hand-down":
-            tar = Posture()
-            tar.position = Position(0.28, -0.25, 0.05)
-            tar.orientation = Orientation(0.0, 0.0, 0.0)
-            res = client.MoveHandEndEffector(tar, 1000, B1HandIndex.kRightHand)
-            time.sleep(0.3)
-            r_num = random.randint(0, 2)
-            if r_num == 0:
-                hand_rock(client)
-            elif r_num == 1:
-                hand_scissor(client)
-            else:
-                hand_paper(client)
-
-        elif input_cmd == "hand-up":
-            tar = Posture()
-            tar.position = Position(0.25, -0.3, 0.25)
-            tar.orientation = Orientation(0.0, -1.0, 0.0)
-            res = client.MoveHandEndEffector(tar, 1000, B1HandIndex.kRightHand)
-            time.sleep(0.3)
-            hand_paper(client)
-
-        elif input_cmd == "paper":
-            hand_paper(client)
-        elif input_cmd == "scissor":
-            hand_scissor(client)
-        elif input_cmd == "rock":
-            hand_rock(client)
-        elif input_cmd == "ok":
-            hand_ok(client)
-        elif input_cmd in ("quit", "exit"):
+        if input_cmd in ("quit", "exit"):
             print("Exiting...")
             break
 
-        if need_print:
-            print(f"Param: {x} {y} {z}")
-            print(f"Head param: {pitch} {yaw}")
+        command = KEYBOARD_COMMANDS.get(input_cmd)
+        if command is None:
+            continue
 
+        res = command(client, state)
+        if asyncio.iscoroutine(res):
+            res = await res
+        res = res or 0
         if res != 0:
             print(f"Request failed: error = {res}")
 
@@ -228,7 +249,7 @@ async def main():
     robot_client.Init()
     set_robot_client(robot_client)
 
-    robot_client.ChangeMode(RobotMode.kWalking)
+    send_mode(robot_client, RobotMode.kWalking)
     print("✓ Robot initialized in walking mode")
 
     print("\n" + "="*60)
@@ -255,9 +276,10 @@ async def main():
         print(f"\n❌ Error: {e}")
     finally:
         robot_client.Move(0.0, 0.0, 0.0)
-        await agent.cleanup()
+        await agent.aclose()
+        agent.cleanup()
         print("✓ Shutdown complete")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run_event_loop(main())
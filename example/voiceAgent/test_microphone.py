@@ -4,11 +4,13 @@ Test Microphone Script using PulseAudio
 Records audio from device 33 (PulseAudio) and plays it back through speakers
 """
 
+import atexit
 import pyaudio
 import numpy as np
 import time
 import sys
 import signal
+import threading
 import wave
 import os
 
@@ -19,48 +21,75 @@ CHANNELS = 1  # Mono
 RATE = 44100
 RECORD_DURATION = 3  # seconds
 DEVICE_INDEX = 33  # PulseAudio device
+PROGRESS_INTERVAL = 0.066  # seconds between progress redraws (~15 Hz)
+PLAYBACK_CHUNK = 8192  # frames per playback write (~190 ms at 44.1 kHz); device buffer is half that
+CAPTURE_RT_PRIORITY = 10  # SCHED_FIFO priority for the capture thread, if permitted
+
+_audio = None
+_devices = None
 
 def signal_handler(sig, frame):
     print('\n⚠️  Test interrupted by user (Ctrl+C)')
     sys.exit(0)
 
+def raise_thread_priority(priority):
+    """Best effort: move the calling thread to SCHED_FIFO (Linux, needs CAP_SYS_NICE)"""
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError):
+        pass
+
+def get_audio():
+    """Shared PyAudio instance, initialised on first use and terminated at exit"""
+    global _audio
+    if _audio is None:
+        _audio = pyaudio.PyAudio()
+        atexit.register(_audio.terminate)
+    return _audio
+
+def get_devices():
+    """Info dicts for every device, enumerated once per process"""
+    global _devices
+    if _devices is None:
+        audio = get_audio()
+        _devices = [audio.get_device_info_by_index(i) for i in range(audio.get_device_count())]
+    return _devices
+
+def get_device_info(device_index):
+    devices = get_devices()
+    if not 0 <= device_index < len(devices):
+        raise ValueError(f"Invalid device index {device_index} ({len(devices)} devices available)")
+    return devices[device_index]
+
 def list_audio_devices():
     """List all available audio devices"""
     print("📋 Available Audio Devices:")
     print("=" * 50)
     
-    audio = pyaudio.PyAudio()
-    
-    try:
-        for i in range(audio.get_device_count()):
-            info = audio.get_device_info_by_index(i)
-            device_type = []
-            
-            if info['maxInputChannels'] > 0:
-                device_type.append("INPUT")
-            if info['maxOutputChannels'] > 0:
-                device_type.append("OUTPUT")
-            
-            device_type_str = "/".join(device_type) if device_type else "N/A"
-            
-            print(f"  Device {i}: {info['name']}")
-            print(f"    Type: {device_type_str}")
-            print(f"    Channels: In={info['maxInputChannels']}, Out={info['maxOutputChannels']}")
-            print(f"    Sample Rate: {info['defaultSampleRate']:.0f}Hz")
-            print(f"    Latency: {info['defaultLowInputLatency']:.3f}s / {info['defaultLowOutputLatency']:.3f}s")
-            print()
-    finally:
-        audio.terminate()
+    for i, info in enumerate(get_devices()):
+        device_type = []
+        
+        if info['maxInputChannels'] > 0:
+            device_type.append("INPUT")
+        if info['maxOutputChannels'] > 0:
+            device_type.append("OUTPUT")
+        
+        device_type_str = "/".join(device_type) if device_type else "N/A"
+        
+        print(f"  Device {i}: {info['name']}")
+        print(f"    Type: {device_type_str}")
+        print(f"    Channels: In={info['maxInputChannels']}, Out={info['maxOutputChannels']}")
+        print(f"    Sample Rate: {info['defaultSampleRate']:.0f}Hz")
+        print(f"    Latency: {info['defaultLowInputLatency']:.3f}s / {info['defaultLowOutputLatency']:.3f}s")
+        print()
 
 def test_device_info(device_index):
     """Test and display information about a specific device"""
     print(f"🔍 Testing Device {device_index}")
     print("=" * 30)
     
-    audio = pyaudio.PyAudio()
-    
     try:
-        device_info = audio.get_device_info_by_index(device_index)
+        device_info = get_device_info(device_index)
         print(f"📱 Device Name: {device_info['name']}")
         print(f"   Max Input Channels: {device_info['maxInputChannels']}")
         print(f"   Max Output Channels: {device_info['maxOutputChannels']}")
@@ -89,17 +118,33 @@ def test_device_info(device_index):
     except Exception as e:
         print(f"❌ Error getting device info: {e}")
         return False
-    finally:
-        audio.terminate()
 
-def record_audio(device_index, duration=RECORD_DURATION):
-    """Record audio from the specified device"""
+def open_wav_writer(filename):
+    wf = wave.open(filename, 'wb')
+    wf.setnchannels(CHANNELS)
+    wf.setsampwidth(2)  # 2 bytes per sample (16-bit)
+    wf.setframerate(RATE)
+    return wf
+
+def record_audio(device_index, duration=RECORD_DURATION, filename=None):
+    """Record audio from the specified device, optionally streaming it to a WAV file.
+
+    The WAV is written to a temporary file next to filename and only replaces it
+    once the whole take has been captured, so a failed run keeps the last recording.
+    """
     print(f"🎤 Recording audio for {duration} seconds...")
     print("   Speak into the microphone now!")
     print("   Press Ctrl+C to stop early")
     
-    audio = pyaudio.PyAudio()
-    frames = []
+    audio = get_audio()
+    wf = None
+    partial = None
+    n_chunks = int(RATE / CHUNK * duration)
+    chunk_bytes = CHUNK * 2  # 2 bytes per sample (16-bit)
+    # One buffer for the whole take; chunks are read straight into it
+    arena = memoryview(bytearray(n_chunks * chunk_bytes))
+    filled = 0
+    captured = 0
     
     try:
         # Open input stream
@@ -113,27 +158,59 @@ def record_audio(device_index, duration=RECORD_DURATION):
         )
         
         print("✅ Input stream opened successfully!")
+        
+        if filename is not None:
+            partial = filename + ".part"
+            wf = open_wav_writer(partial)
+        
         print("🔴 Recording...")
         
-        # Record audio
-        for i in range(0, int(RATE / CHUNK * duration)):
+        # Record audio on its own thread; it only writes the buffer and counters,
+        # this thread only reads them to draw progress
+        stop = threading.Event()
+        error = None
+        
+        def capture():
+            nonlocal filled, captured, error
+            raise_thread_priority(CAPTURE_RT_PRIORITY)
+            # Overflows don't raise with exception_on_overflow=False, so anything
+            # caught here means the stream itself failed
             try:
-                data = input_stream.read(CHUNK, exception_on_overflow=False)
-                frames.append(data)
-                
-                # Show progress
-                progress = (i / (RATE / CHUNK * duration)) * 100
-                print(f"\r🎤 Recording... {progress:.1f}%", end="", flush=True)
-                
+                for _ in range(n_chunks):
+                    if stop.is_set():
+                        break
+                    data = input_stream.read(CHUNK, exception_on_overflow=False)
+                    arena[filled:filled + len(data)] = data
+                    filled += len(data)
+                    captured += 1
+                    if wf is not None:
+                        # Raw write: the header's frame count is patched once on close
+                        wf.writeframesraw(data)
             except Exception as e:
-                if "Input overflowed" in str(e):
-                    # This is normal, just continue
-                    continue
-                else:
-                    print(f"\n❌ Recording error: {e}")
-                    break
+                error = e
+        
+        reader = threading.Thread(target=capture, name="mic-capture", daemon=True)
+        reader.start()
+        try:
+            while reader.is_alive():
+                reader.join(PROGRESS_INTERVAL)
+                progress = (captured / n_chunks) * 100
+                print(f"\r🎤 Recording... {progress:.1f}%", end="", flush=True)
+        finally:
+            # Ctrl+C exits from this thread; let the reader finish before the stream closes
+            stop.set()
+            reader.join()
+        
+        if error is not None:
+            print(f"\n❌ Recording error: {error}")
         
-        print(f"\n✅ Recording completed! Captured {len(frames)} chunks")
+        print(f"\n✅ Recording completed! Captured {captured} chunks")
+        if wf is not None and error is None:
+            wf.close()
+            wf = None
+            os.replace(partial, filename)
+            partial = None
+            print(f"✅ Audio saved to {filename}")
         
     except Exception as e:
         print(f"❌ Error opening input stream: {e}")
@@ -142,15 +219,19 @@ def record_audio(device_index, duration=RECORD_DURATION):
         if 'input_stream' in locals():
             input_stream.stop_stream()
             input_stream.close()
-        audio.terminate()
+        if wf is not None:
+            wf.close()
+        if partial is not None and os.path.exists(partial):
+            os.remove(partial)
     
-    return b''.join(frames)
+    # PyAudio's stream.write only takes read-only bytes, so hand back one bytes copy
+    return bytes(arena[:filled])
 
 def play_audio(device_index, audio_data):
     """Play audio through the specified device"""
     print(f"🔊 Playing back recorded audio...")
     
-    audio = pyaudio.PyAudio()
+    audio = get_audio()
     
     try:
         # Open output stream
@@ -160,23 +241,18 @@ def play_audio(device_index, audio_data):
             rate=RATE,
             output=True,
             output_device_index=device_index,
-            frames_per_buffer=CHUNK
+            frames_per_buffer=PLAYBACK_CHUNK // 2
         )
         
         print("✅ Output stream opened successfully!")
         print("🔊 Playing back...")
         
-        # Play audio in chunks
-        total_chunks = len(audio_data) // (CHUNK * 2)  # 2 bytes per sample (16-bit)
-        
-        for i in range(0, len(audio_data), CHUNK * 2):
-            chunk = audio_data[i:i + CHUNK * 2]
-            if len(chunk) > 0:
-                output_stream.write(chunk)
-                
-                # Show progress
-                progress = (i / len(audio_data)) * 100
-                print(f"\r🔊 Playing... {progress:.1f}%", end="", flush=True)
+        # Play audio in large blocks; each write blocks in PortAudio, so fewer is cheaper
+        block_bytes = PLAYBACK_CHUNK * 2  # 2 bytes per sample (16-bit)
+        for i in range(0, len(audio_data), block_bytes):
+            progress = (i / len(audio_data)) * 100
+            print(f"\r🔊 Playing... {progress:.1f}%", end="", flush=True)
+            output_stream.write(audio_data[i:i + block_bytes])
         
         print(f"\n✅ Playback completed!")
         
@@ -186,24 +262,6 @@ def play_audio(device_index, audio_data):
         if 'output_stream' in locals():
             output_stream.stop_stream()
             output_stream.close()
-        audio.terminate()
-
-def save_audio_to_file(audio_data, filename="test_recording.wav"):
-    """Save recorded audio to a WAV file"""
-    print(f"💾 Saving audio to {filename}...")
-    
-    try:
-        with wave.open(filename, 'wb') as wf:
-            wf.setnchannels(CHANNELS)
-            wf.setsampwidth(2)  # 2 bytes per sample (16-bit)
-            wf.setframerate(RATE)
-            wf.writeframes(audio_data)
-        
-        print(f"✅ Audio saved to {filename}")
-        return True
-    except Exception as e:
-        print(f"❌ Error saving audio: {e}")
-        return False
 
 def load_audio_from_file(filename="test_recording.wav"):
     """Load audio from a WAV file"""
@@ -235,19 +293,14 @@ def test_microphone_playback(device_index=DEVICE_INDEX):
     
     print()
     
-    # Record audio
-    audio_data = record_audio(device_index, RECORD_DURATION)
+    # Record audio, writing it to file as it is captured
+    audio_data = record_audio(device_index, RECORD_DURATION, filename="test_recording.wav")
     if audio_data is None:
         print("❌ Recording failed. Cannot proceed.")
         return False
     
     print()
     
-    # Save to file
-    save_audio_to_file(audio_data)
-    
-    print()
-    
     # Play back the recorded audio
     play_audio(device_index, audio_data)
     
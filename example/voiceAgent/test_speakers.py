@@ -15,11 +15,32 @@ FORMAT = pyaudio.paInt16
 CHANNELS = 1  # Mono
 RATE = 44100
 DURATION = 5  # seconds
+PROGRESS_INTERVAL = 0.1  # seconds between progress redraws
 
 def signal_handler(sig, frame):
     print('\n⚠️  Test interrupted by user (Ctrl+C)')
     sys.exit(0)
 
+def tone_chunks(frequency, samples):
+    """Yield (offset, int16 chunk) of a sine tone from a running phase, reusing one set of buffers"""
+    # Each yielded chunk is overwritten on the next iteration, so write it out first
+    dphi = 2 * np.pi * frequency / RATE
+    phase_inc = np.arange(CHUNK, dtype=np.float32) * np.float32(dphi)
+    out_f = np.empty(CHUNK, dtype=np.float32)
+    out_i = np.empty(CHUNK, dtype=np.int16)
+    phase = 0.0
+    
+    for i in range(0, samples, CHUNK):
+        chunk_samples = min(CHUNK, samples - i)
+        f = out_f[:chunk_samples]
+        np.add(phase_inc[:chunk_samples], np.float32(phase), out=f)
+        np.sin(f, out=f)
+        np.multiply(f, 32767, out=f)
+        np.rint(f, out=f)
+        out_i[:chunk_samples] = f
+        phase = (phase + chunk_samples * dphi) % (2 * np.pi)
+        yield i, out_i[:chunk_samples]
+
 def test_speakers():
     """Test speaker output with a simple tone"""
     print("🔊 Speaker Test Script")
@@ -60,22 +81,18 @@ def test_speakers():
         # Generate a simple sine wave tone (440Hz - A note)
         frequency = 440
         samples = int(RATE * DURATION)
+        last_draw = 0.0
         
-        for i in range(0, samples, CHUNK):
-            # Generate sine wave
-            chunk_samples = min(CHUNK, samples - i)
-            t = np.linspace(i / RATE, (i + chunk_samples) / RATE, chunk_samples)
-            wave = np.sin(2 * np.pi * frequency * t)
-            
-            # Convert to 16-bit integers
-            audio_data = (wave * 32767).astype(np.int16)
-            
+        for i, audio_data in tone_chunks(frequency, samples):
             # Write to stream
             stream.write(audio_data.tobytes())
             
-            # Show progress
-            progress = (i / samples) * 100
-            print(f"\r🎵 Playing... {progress:.1f}%", end="", flush=True)
+            # Show progress, throttled so the terminal doesn't flush every chunk
+            now = time.monotonic()
+            if now - last_draw > PROGRESS_INTERVAL:
+                last_draw = now
+                progress = (i / samples) * 100
+                print(f"\r🎵 Playing... {progress:.1f}%", end="", flush=True)
         
         print(f"\n✅ Test completed! You should have heard a {frequency}Hz tone for {DURATION} seconds.")
         
@@ -127,25 +144,27 @@ def test_with_device(device_index):
         # Generate stereo tone if supported
         frequency = 440
         samples = int(RATE * DURATION)
+        last_draw = 0.0
         
-        for i in range(0, samples, CHUNK):
-            chunk_samples = min(CHUNK, samples - i)
-            t = np.linspace(i / RATE, (i + chunk_samples) / RATE, chunk_samples)
-            wave = np.sin(2 * np.pi * frequency * t)
-            
-            # Convert to 16-bit integers
-            audio_data = (wave * 32767).astype(np.int16)
-            
-            # If stereo, duplicate the channel
+        stereo_out = np.empty((CHUNK, 2), dtype=np.int16)
+        
+        for i, audio_data in tone_chunks(frequency, samples):
+            # If stereo, duplicate the channel into the preallocated interleaved buffer
             if channels == 2:
-                audio_data = np.column_stack((audio_data, audio_data))
+                chunk_samples = len(audio_data)
+                stereo_out[:chunk_samples, 0] = audio_data
+                stereo_out[:chunk_samples, 1] = audio_data
+                audio_data = stereo_out[:chunk_samples]
             
             # Write to stream
             stream.write(audio_data.tobytes())
             
-            # Show progress
-            progress = (i / samples) * 100
-            print(f"\r🎵 Playing... {progress:.1f}%", end="", flush=True)
+            # Show progress, throttled so the terminal doesn't flush every chunk
+            now = time.monotonic()
+            if now - last_draw > PROGRESS_INTERVAL:
+                last_draw = now
+                progress = (i / samples) * 100
+                print(f"\r🎵 Playing... {progress:.1f}%", end="", flush=True)
         
         print(f"\n✅ Test completed!")
         
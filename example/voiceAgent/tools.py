@@ -1,12 +1,151 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Dict, Any
+from collections import OrderedDict
 from datetime import datetime
+from urllib.parse import urlsplit
+import json
+import socket
+import threading
 import time
 
 
+# One pooled session for all HTTP tools so repeat calls reuse keep-alive connections
+_SESSION = requests.Session()
+# Retries cover connect errors and gateway errors on idempotent methods only
+# (urllib3 skips POST by default). Once they run out the last response is
+# returned rather than raised, so callers and the breaker still see the status;
+# a server's Retry-After is ignored so it can't park a tool thread for minutes.
+_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.3,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+)
+_SESSION.mount("https://", _ADAPTER)
+_SESSION.mount("http://", _ADAPTER)
+
+# Fixed hosts the tools talk to; resolved once in the background at import so
+# the first tool call doesn't also pay for the DNS lookup
+WARM_DNS_HOSTS = ("wttr.in",)
+
+
+def _warm_dns():
+    for host in WARM_DNS_HOSTS:
+        try:
+            socket.getaddrinfo(host, 443, type=socket.SOCK_STREAM)
+        except OSError:
+            pass  # Offline or no DNS yet; the real request will report it
+
+
+threading.Thread(target=_warm_dns, name="dns-warmup", daemon=True).start()
+
+BREAKER_FAILURES = 3  # consecutive failed requests before a host is short-circuited
+BREAKER_COOLDOWN = 30  # seconds an open host fails fast before one probe is let through
+
+
+class ServiceUnavailable(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Per-host consecutive failure counter; open hosts fail fast instead of timing out"""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.failures = {}  # host -> consecutive failures
+        self.opened_at = {}  # host -> time.monotonic() the host was opened (or last probed)
+    
+    def allow(self, host: str) -> bool:
+        with self.lock:
+            opened_at = self.opened_at.get(host)
+            if opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - opened_at < BREAKER_COOLDOWN:
+                return False
+            # Half-open: this caller probes, everyone else waits another cooldown
+            self.opened_at[host] = now
+            return True
+    
+    def record_success(self, host: str):
+        with self.lock:
+            self.failures.pop(host, None)
+            self.opened_at.pop(host, None)
+    
+    def record_failure(self, host: str):
+        with self.lock:
+            count = self.failures.get(host, 0) + 1
+            self.failures[host] = count
+            if count >= BREAKER_FAILURES:
+                self.opened_at[host] = time.monotonic()
+
+
+_BREAKER = CircuitBreaker()
+
+
+def _request(method: str, url: str, **kwargs) -> requests.Response:
+    parts = urlsplit(url) if isinstance(url, str) else None
+    if parts is None or not parts.scheme or not parts.netloc:
+        raise requests.exceptions.InvalidURL(f"Invalid URL {url!r}: expected an absolute URL like https://host/path")
+    host = parts.netloc
+    if not _BREAKER.allow(host):
+        raise ServiceUnavailable(f"{host} is temporarily unavailable, try again shortly")
+    try:
+        response = _SESSION.request(method, url, **kwargs)
+    except (requests.ConnectionError, requests.Timeout):
+        # Only the host being unreachable or slow counts; other RequestExceptions
+        # (bad schema, headers, ...) are the caller's mistake and just propagate
+        _BREAKER.record_failure(host)
+        raise
+    if response.status_code >= 500:
+        _BREAKER.record_failure(host)
+    else:
+        _BREAKER.record_success(host)
+    return response
+
+WEATHER_CACHE_TTL = 300  # seconds; wttr.in only updates every few minutes
+WEATHER_STALE_TTL = 2 * WEATHER_CACHE_TTL  # past the TTL but within this, serve stale and refresh
+WEATHER_CACHE_SIZE = 256
+# Normalized location -> (fetched_at, result), least recently used first.
+# Tools run on worker threads, so access goes through the lock.
+_WEATHER_CACHE = OrderedDict()
+_WEATHER_CACHE_LOCK = threading.Lock()
+# Keys with a background refresh in flight, also guarded by the lock
+_WEATHER_REFRESHING = set()
+
+
+def _cached_weather(key: str, now: float):
+    """(result, fresh) for a servable entry, or None if missing or too old"""
+    with _WEATHER_CACHE_LOCK:
+        entry = _WEATHER_CACHE.get(key)
+        if entry is None:
+            return None
+        age = now - entry[0]
+        if age >= WEATHER_STALE_TTL:
+            return None
+        _WEATHER_CACHE.move_to_end(key)
+        return entry[1], age < WEATHER_CACHE_TTL
+
+
+def _store_weather(key: str, now: float, result: Dict[str, Any]):
+    with _WEATHER_CACHE_LOCK:
+        _WEATHER_CACHE[key] = (now, result)
+        _WEATHER_CACHE.move_to_end(key)
+        while len(_WEATHER_CACHE) > WEATHER_CACHE_SIZE:
+            _WEATHER_CACHE.popitem(last=False)
+
+
 def get_current_time(args: Dict[str, Any]) -> Dict[str, Any]:
-    current_time = datetime.now().strftime("%I:%M %p")
-    current_date = datetime.now().strftime("%B %d, %Y")
+    now = datetime.now()
+    current_time = now.strftime("%I:%M %p")
+    current_date = now.strftime("%B %d, %Y")
     return {
         "time": current_time,
         "date": current_date,
@@ -14,19 +153,78 @@ def get_current_time(args: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def get_weather(args: Dict[str, Any]) -> Dict[str, Any]:
-    location = args.get("location", "Berkeley")
-    response = requests.get(f"https://wttr.in/{location}?format=j1", timeout=5)
-    data = response.json()
-    current = data['current_condition'][0]
-    temp_f = current['temp_F']
-    weather_desc = current['weatherDesc'][0]['value']
-    return {
+def _current_conditions(data) -> tuple:
+    """(temp_F, description) from a wttr.in format=j1 payload"""
+    try:
+        current = data['current_condition'][0]
+        return current['temp_F'], current['weatherDesc'][0]['value']
+    except (KeyError, IndexError, TypeError) as e:
+        raise ValueError(f"Unexpected wttr.in response ({type(e).__name__}: {e})") from None
+
+
+def _fetch_weather(location: str, key: str) -> Dict[str, Any]:
+    now = time.monotonic()
+    response = _request("GET", f"https://wttr.in/{location}?format=j1", timeout=(3.05, 5))
+    try:
+        temp_f, weather_desc = _current_conditions(response.json())
+    except ValueError as e:
+        # Not cached, so the next ask retries
+        return {
+            "error": str(e),
+            "message": f"Couldn't get the weather for {location}"
+        }
+    result = {
         "location": location,
         "temperature": f"{temp_f}°F",
         "condition": weather_desc,
         "message": f"The weather in {location} is {weather_desc} with a temperature of {temp_f}°F"
     }
+    _store_weather(key, now, result)
+    return result
+
+
+def _refresh_weather(location: str, key: str):
+    try:
+        _fetch_weather(location, key)
+    except Exception:
+        pass  # Keep serving the stale entry until it ages out
+    finally:
+        with _WEATHER_CACHE_LOCK:
+            _WEATHER_REFRESHING.discard(key)
+
+
+def _start_weather_refresh(location: str, key: str):
+    with _WEATHER_CACHE_LOCK:
+        if key in _WEATHER_REFRESHING:
+            return
+        _WEATHER_REFRESHING.add(key)
+    threading.Thread(target=_refresh_weather, args=(location, key), daemon=True).start()
+
+
+def get_weather(args: Dict[str, Any]) -> Dict[str, Any]:
+    location = args.get("location", "Berkeley")
+    key = location.strip().lower()
+    cached = _cached_weather(key, time.monotonic())
+    if cached is None:
+        return _fetch_weather(location, key)
+    result, fresh = cached
+    if not fresh:
+        _start_weather_refresh(location, key)
+    return result
+
+
+MOVE_DIRECTION_ORDER = ("forward", "backward", "left", "right", "turn_left", "turn_right")
+MOVE_DIRECTIONS = frozenset(MOVE_DIRECTION_ORDER)
+MOVE_DIRECTIONS_TEXT = ", ".join(MOVE_DIRECTION_ORDER)
+LINEAR_DIRECTIONS = frozenset({"forward", "backward"})
+
+
+def _as_float(value):
+    """float(value), or None if the model sent something that isn't a number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
 
 
 def move_robot(args: Dict[str, Any]) -> Dict[str, Any]:
@@ -34,26 +232,27 @@ def move_robot(args: Dict[str, Any]) -> Dict[str, Any]:
     Move the robot in a specific direction for a specified duration
     """
     direction = args.get("direction", "forward").lower()
-    duration = args.get("duration", 1.0)  # Default 1 second
-    speed = args.get("speed", 0.5)  # Default moderate speed (0.0 to 1.0)
+    raw_duration = args.get("duration", 1.0)  # Default 1 second
+    raw_speed = args.get("speed", 0.5)  # Default moderate speed (0.0 to 1.0)
+    duration = _as_float(raw_duration)
+    speed = _as_float(raw_speed)
     
-    # Validate inputs
-    if duration <= 0 or duration > 10:
+    # Validate inputs; chained comparisons also reject NaN
+    if duration is None or not 0.1 <= duration <= 10:
         return {
             "error": "Duration must be between 0.1 and 10 seconds",
-            "message": f"Invalid duration: {duration} seconds"
+            "message": f"Invalid duration: {raw_duration} seconds"
         }
     
-    if speed < 0 or speed > 1:
+    if speed is None or not 0.0 <= speed <= 1.0:
         return {
             "error": "Speed must be between 0.0 and 1.0",
-            "message": f"Invalid speed: {speed}"
+            "message": f"Invalid speed: {raw_speed}"
         }
     
-    valid_directions = ["forward", "backward", "left", "right", "turn_left", "turn_right"]
-    if direction not in valid_directions:
+    if direction not in MOVE_DIRECTIONS:
         return {
-            "error": f"Invalid direction. Must be one of: {', '.join(valid_directions)}",
+            "error": f"Invalid direction. Must be one of: {MOVE_DIRECTIONS_TEXT}",
             "message": f"Unknown direction: {direction}"
         }
     
@@ -67,7 +266,7 @@ def move_robot(args: Dict[str, Any]) -> Dict[str, Any]:
         time.sleep(min(duration, 0.1))  # Don't actually sleep for long periods
         
         # Calculate movement distance/angle based on direction and duration
-        if direction in ["forward", "backward"]:
+        if direction in LINEAR_DIRECTIONS:
             distance = duration * speed * 0.5  # meters (rough estimate)
             movement_type = "linear"
         else:
@@ -91,26 +290,62 @@ def move_robot(args: Dict[str, Any]) -> Dict[str, Any]:
         }
 
 
+API_METHODS = frozenset({"GET", "POST", "PUT", "DELETE"})
+API_BODY_METHODS = frozenset({"POST", "PUT"})
+API_MAX_BYTES = 1 << 20  # cap on response bodies handed back to the model
+
+
+def _read_capped(response: requests.Response, max_bytes: int) -> tuple:
+    """(body, truncated) reading at most max_bytes of the decoded body"""
+    body = bytearray()
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        body += chunk
+        if len(body) > max_bytes:
+            return bytes(body[:max_bytes]), True
+    return bytes(body), False
+
+
 def make_api_call(args: Dict[str, Any]) -> Dict[str, Any]:
     url = args.get("url")
     method = args.get("method", "GET").upper()
     headers = args.get("headers", {})
     body = args.get("body", None)
     
-    if method == "GET":
-        response = requests.get(url, headers=headers, timeout=10)
-    elif method == "POST":
-        response = requests.post(url, headers=headers, json=body, timeout=10)
-    elif method == "PUT":
-        response = requests.put(url, headers=headers, json=body, timeout=10)
-    elif method == "DELETE":
-        response = requests.delete(url, headers=headers, timeout=10)
+    if method not in API_METHODS:
+        return {
+            "error": f"Invalid method. Must be one of: {', '.join(sorted(API_METHODS))}",
+            "message": f"Unsupported HTTP method: {method}"
+        }
     
-    return {
+    response = _request(
+        method, url, headers=headers,
+        json=body if method in API_BODY_METHODS else None,
+        timeout=(3.05, 10),
+        stream=True
+    )
+    
+    # Read only as much as we'll keep; closing returns the connection to the pool
+    try:
+        content_type = response.headers.get('content-type', '')
+        raw, truncated = _read_capped(response, API_MAX_BYTES)
+        encoding = response.encoding or 'utf-8'
+    finally:
+        response.close()
+    
+    if content_type.startswith('application/json') and not truncated:
+        data = json.loads(raw)
+    else:
+        data = raw.decode(encoding, errors='replace')
+    
+    result = {
         "status_code": response.status_code,
-        "data": response.json() if response.headers.get('content-type', '').startswith('application/json') else response.text,
+        "data": data,
         "message": f"API call to {url} completed with status {response.status_code}"
     }
+    if truncated:
+        result["truncated"] = True
+        result["message"] += f" (response truncated to {API_MAX_BYTES} bytes)"
+    return result
 
 
 TOOLS_REGISTRY = {
@@ -120,6 +355,10 @@ TOOLS_REGISTRY = {
     "move_robot": move_robot,
 }
 
+# Tools that only read or call out over HTTP and may overlap; anything else
+# (including tools an agent adds) moves the robot and runs one call at a time
+CONCURRENT_TOOLS = frozenset({"get_current_time", "get_weather", "make_api_call"})
+
 TOOLS_DEFINITIONS = [
     {
         "type": "function",
@@ -183,7 +422,7 @@ TOOLS_DEFINITIONS = [
             "properties": {
                 "direction": {
                     "type": "string",
-                    "enum": ["forward", "backward", "left", "right", "turn_left", "turn_right"],
+                    "enum": list(MOVE_DIRECTION_ORDER),
                     "description": "The direction to move the robot"
                 },
                 "duration": {